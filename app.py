@@ -3,44 +3,114 @@ Oracle Cloud Instance Manager - Admin Panel
 Multi-account support with separate .env files for each OCI account
 """
 
+# Must run before anything else imports socket/threading/time
+import eventlet
+eventlet.monkey_patch()
+
 import os
 import sys
 import json
 import time
 import logging
 import threading
+import re
 import secrets
-import glob
-from datetime import datetime, timezone
+import stat
+import tempfile
+import bisect
+import hashlib
+import itertools
+import queue
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 from pathlib import Path
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
-from flask_socketio import SocketIO, emit
-from dotenv import load_dotenv, set_key, dotenv_values
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, session, flash
+from flask.json.provider import JSONProvider
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from dotenv import load_dotenv, dotenv_values
 import oci
+import orjson
 
 import random
 
 # Load main environment variables
 load_dotenv()
 
+class OrjsonProvider(JSONProvider):
+    """Serve jsonify() responses through orjson"""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Hand orjson's bytes straight to the response, skipping the str round trip
+        return self._app.response_class(orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS), mimetype='application/json')
+
 app = Flask(__name__)
-app.secret_key = os.getenv('SECRET_KEY', secrets.token_hex(32))
+app.json = OrjsonProvider(app)
+app.secret_key = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
 app.config['SESSION_COOKIE_SECURE'] = False
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# msgpack frames pair with the socket.io.msgpack client bundle loaded in base.html.
+# Polling responses over 1 KiB are compressed; on the websocket transport eventlet
+# negotiates permessage-deflate itself whenever the browser offers it.
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode='eventlet',
+    serializer='msgpack',
+    http_compression=True,
+    compression_threshold=1024
+)
 
 # Accounts directory
 ACCOUNTS_DIR = os.getenv('ACCOUNTS_DIR', './accounts')
 os.makedirs(ACCOUNTS_DIR, exist_ok=True)
 
+# Web server settings, read once at startup
+WEB_HOST = os.getenv('WEB_HOST', '0.0.0.0')
+WEB_PORT = int(os.getenv('WEB_PORT', 5000))
+DEBUG = os.getenv('DEBUG', 'false').lower() == 'true'
+
 # Global state - now per account
-bot_threads = {}  # account_id -> thread
+bot_threads = {}  # account_id -> background task (greenlet)
 bot_status = {}   # account_id -> status dict
-logs_buffer = {}  # account_id -> list of logs
+bot_status_lock = threading.Lock()  # guards starting/stopping bots
+EMPTY_STATUS = {}  # shared read-only fallback for accounts with no status yet - never mutate
+_dirty_statuses = set()  # account_ids whose status changed since the last broadcast
+_status_lock = threading.Lock()
+_status_broadcaster = None
+_status_snapshot = None  # copy of bot_status sent on connect, rebuilt when an entry is added or replaced
 MAX_LOGS = 500
+MAX_TOTAL_RECORDS = 50_000   # cap on buffered log records across all accounts
+MAX_LOGS_PER_SECOND = 100    # per-account rate above which records are dropped
+LOG_HISTORY_BYTES = 64 * 1024  # message budget for log history sent over the socket
+RETRY_REPORT_INTERVAL = 30   # seconds between repeated reports of the same retry error
+STATUS_BROADCAST_INTERVAL = 0.5  # seconds between batched bot_status broadcasts
+logs_buffer = defaultdict(lambda: deque(maxlen=MAX_LOGS))  # account_id -> ring buffer of logs
+_total_log_records = 0
+recent_logs = deque(maxlen=100)  # (created, seq, entry) for the newest logs across all accounts, in time order
+_recent_seq = itertools.count()  # tie-breaker so equal timestamps never compare the entry dicts
+_logs_subscribers = 0  # clients currently connected to the /logs namespace
+ALL_LOGS_ROOM = 'acct:*'  # room for clients following every account's logs
+LOG_FLUSH_INTERVAL = 0.025  # seconds of log lines coalesced into one log_batch frame
+LOG_QUEUE_SIZE = 10_000  # log entries waiting for the flusher before the oldest are dropped
+log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_log_flusher = None
+
+# Parsed account .env files, invalidated when the file's mtime changes
+_accounts_cache = {}  # filepath -> (mtime_ns, config)
+_accounts_cache_lock = threading.Lock()
+
+# OCI clients per account, rebuilt when the account's .env file changes
+_client_cache = {}  # account_id -> (mtime_ns, clients)
+_client_cache_lock = threading.Lock()
 
 # ======================== LOGGING SETUP ======================== #
 
@@ -49,26 +119,157 @@ class SocketIOHandler(logging.Handler):
     def __init__(self, account_id=None):
         super().__init__()
         self.account_id = account_id
+        self._window_start = 0.0
+        self._window_count = 0
+        self._truncated = 0
     
     def emit(self, record):
         try:
-            log_entry = {
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            # Rate limit noisy accounts, remembering how much was dropped
+            if record.created - self._window_start >= 1.0:
+                self._window_start = record.created
+                self._window_count = 0
+            self._window_count += 1
+            if self._window_count > MAX_LOGS_PER_SECOND:
+                self._truncated += 1
+                return
+            
+            # Reuse the record's own creation time instead of reading the clock again
+            timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.created))
+            
+            if self._truncated:
+                self._publish({
+                    'timestamp': timestamp,
+                    'created': record.created,
+                    'level': 'WARNING',
+                    'message': f"Log rate limit exceeded, truncated {self._truncated} records",
+                    'account_id': self.account_id
+                })
+                self._truncated = 0
+            
+            self._publish({
+                'timestamp': timestamp,
+                'created': record.created,
                 'level': record.levelname,
                 'message': self.format(record),
                 'account_id': self.account_id
-            }
-            
-            if self.account_id:
-                if self.account_id not in logs_buffer:
-                    logs_buffer[self.account_id] = []
-                logs_buffer[self.account_id].append(log_entry)
-                if len(logs_buffer[self.account_id]) > MAX_LOGS:
-                    logs_buffer[self.account_id].pop(0)
-            
-            socketio.emit('log_message', log_entry, namespace='/logs')
+            })
         except Exception:
             pass
+    
+    def _publish(self, log_entry):
+        enqueue_log(log_entry)
+
+def enqueue_log(log_entry):
+    """Hand a log entry to the flusher; when the queue is full the oldest entry is dropped"""
+    global _log_flusher
+    try:
+        log_queue.put_nowait(log_entry)
+    except queue.Full:
+        try:
+            log_queue.get_nowait()
+        except queue.Empty:
+            pass
+        log_queue.put_nowait(log_entry)
+    
+    if _log_flusher is None:
+        _log_flusher = socketio.start_background_task(log_flush_loop)
+
+def log_flush_loop():
+    """Single consumer of log_queue: buffers entries and emits one log_batch per account
+    every LOG_FLUSH_INTERVAL"""
+    while True:
+        entries = [log_queue.get()]
+        # Let the window fill before taking everything queued so far
+        socketio.sleep(LOG_FLUSH_INTERVAL)
+        try:
+            while True:
+                entries.append(log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        # A bad entry must not end the loop - nothing restarts the flusher
+        try:
+            flush_logs(entries)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(entries)} log entries: {e}")
+
+def flush_logs(entries):
+    """Buffer a window of log entries and emit them as one log_batch per account"""
+    batches = defaultdict(list)
+    for log_entry in entries:
+        account_id = log_entry['account_id']
+        if account_id:
+            buffer_log(account_id, log_entry)
+        batches[account_id].append(log_entry)
+    
+    # Nobody is listening - skip the socket entirely
+    if not _logs_subscribers:
+        return
+    
+    for account_id, batch in batches.items():
+        rooms = [ALL_LOGS_ROOM, log_room(account_id)] if account_id else ALL_LOGS_ROOM
+        try:
+            socketio.emit('log_batch', batch, to=rooms, namespace='/logs')
+        except Exception:
+            pass
+
+def log_room(account_id):
+    """Socket.IO room for clients following one account's logs"""
+    return f'acct:{account_id}'
+
+def buffer_log(account_id, log_entry):
+    """Append a log entry, keeping the total across accounts under MAX_TOTAL_RECORDS"""
+    global _total_log_records
+    
+    buf = logs_buffer[account_id]
+    if len(buf) < MAX_LOGS:
+        # The deque won't evict on its own, so this append grows the total
+        if _total_log_records >= MAX_TOTAL_RECORDS:
+            _evict_oldest_log()
+        _total_log_records += 1
+    buf.append(log_entry)
+    remember_recent_log(log_entry)
+
+def remember_recent_log(log_entry):
+    """Keep recent_logs as the time-ordered tail across all accounts"""
+    item = (log_entry['created'], next(_recent_seq), log_entry)
+    if not recent_logs or item >= recent_logs[-1]:
+        recent_logs.append(item)
+    elif len(recent_logs) < recent_logs.maxlen or item >= recent_logs[0]:
+        # Rare late arrival (e.g. the clock stepped back) - slot it into place;
+        # plain tuple ordering keeps this working without insort's 3.10+ key=
+        if len(recent_logs) == recent_logs.maxlen:
+            recent_logs.popleft()
+        bisect.insort(recent_logs, item)
+
+def recent_log_entries():
+    """The entries of recent_logs, oldest first"""
+    return [item[2] for item in recent_logs]
+
+def _evict_oldest_log():
+    """Drop the oldest buffered entry across all accounts"""
+    global _total_log_records
+    
+    oldest = min((buf for buf in logs_buffer.values() if buf), key=lambda buf: buf[0]['created'], default=None)
+    if oldest is not None:
+        oldest.popleft()
+        _total_log_records -= 1
+
+def log_tail(buf, count, max_bytes=None):
+    """Return the last `count` entries of a log buffer as a list, optionally
+    stopping once their messages add up to more than `max_bytes`"""
+    # Walk in from the newest end so the cost is O(count), not O(len(buf))
+    tail = []
+    size = 0
+    for entry in itertools.islice(reversed(buf), count):
+        if max_bytes is not None:
+            size += len(entry['message'])
+            if size > max_bytes:
+                break
+        tail.append(entry)
+    tail.reverse()
+    return tail
 
 # Main logger
 logger = logging.getLogger('oci_manager')
@@ -87,7 +288,7 @@ def get_account_logger(account_id):
         socket_handler = SocketIOHandler(account_id)
         socket_handler.setFormatter(logging.Formatter('%(message)s'))
         account_logger.addHandler(socket_handler)
-        account_logger.addHandler(console_handler)
+        # Console output comes from the parent 'oci_manager' logger via propagation
     
     return account_logger
 
@@ -112,56 +313,145 @@ def get_credentials():
 def get_accounts():
     """Get list of all accounts"""
     accounts = []
-    env_files = glob.glob(os.path.join(ACCOUNTS_DIR, '*.env'))
     
-    for env_file in env_files:
-        account_id = os.path.basename(env_file).replace('.env', '')
-        config = dotenv_values(env_file)
-        
-        # Get bot status for this account
-        status = bot_status.get(account_id, {
-            'running': False,
-            'start_time': None,
-            'retry_count': 0,
-            'last_error': None,
-            'last_check': None,
-            'current_ad': None
-        })
-        
-        accounts.append({
-            'id': account_id,
-            'name': config.get('ACCOUNT_NAME', account_id),
-            'region': config.get('OCI_REGION', 'Unknown'),
-            'shape': config.get('OCI_SHAPE', 'Unknown'),
-            'ocpus': config.get('OCI_OCPUS', '0'),
-            'memory': config.get('OCI_MEMORY_IN_GBS', '0'),
-            'status': status,
-            'file': env_file
-        })
+    seen = set()
+    with os.scandir(ACCOUNTS_DIR) as entries:
+        for entry in entries:
+            # Same matches as glob('*.env'); is_file() uses the cached d_type
+            if entry.name.startswith('.') or not entry.name.endswith('.env') or not entry.is_file():
+                continue
+            
+            env_file = entry.path
+            seen.add(env_file)
+            config = _load_env(env_file, entry.stat().st_mtime_ns)
+            
+            account_id = entry.name[:-4]
+            
+            # Get bot status for this account
+            status = bot_status.get(account_id, {
+                'running': False,
+                'start_time': None,
+                'retry_count': 0,
+                'last_error': None,
+                'last_check': None,
+                'current_ad': None
+            })
+            
+            accounts.append({
+                'id': account_id,
+                'name': config.get('ACCOUNT_NAME', account_id),
+                'region': config.get('OCI_REGION', 'Unknown'),
+                'shape': config.get('OCI_SHAPE', 'Unknown'),
+                'ocpus': config.get('OCI_OCPUS', '0'),
+                'memory': config.get('OCI_MEMORY_IN_GBS', '0'),
+                'status': status,
+                'file': env_file
+            })
+    
+    # Drop entries for files removed outside the panel
+    with _accounts_cache_lock:
+        for env_file in list(_accounts_cache):
+            if env_file not in seen:
+                del _accounts_cache[env_file]
     
     return accounts
 
+def _load_env(env_file, mtime_ns):
+    """Parse an .env file, reusing the cached parse while its mtime is unchanged"""
+    with _accounts_cache_lock:
+        cached = _accounts_cache.get(env_file)
+        if cached is None or cached[0] != mtime_ns:
+            cached = (mtime_ns, dotenv_values(env_file))
+            _accounts_cache[env_file] = cached
+        return cached[1]
+
+def _invalidate_account_cache(env_file):
+    """Forget the cached parse of an account .env file"""
+    with _accounts_cache_lock:
+        _accounts_cache.pop(env_file, None)
+
 def get_account_config(account_id):
     """Get configuration for specific account"""
     env_file = os.path.join(ACCOUNTS_DIR, f'{account_id}.env')
-    if os.path.exists(env_file):
-        return dotenv_values(env_file)
-    return None
+    try:
+        st = os.stat(env_file)
+    except OSError:
+        return None
+    # Shared cached dict - callers must not mutate it
+    return _load_env(env_file, st.st_mtime_ns)
+
+def write_file_atomic(path, content, mode=None):
+    """Write to a temp file and swap it in so readers never see a half-written file"""
+    # The swapped-in file is a new inode, so carry the original mode over;
+    # these files hold credentials, so new ones start owner-only
+    if mode is None:
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o600
+    
+    fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.tmp_')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            os.fchmod(f.fileno(), mode)
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+    except BaseException:
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
+
+def update_env_file(env_file, values):
+    """Set several keys in an .env file with a single rewrite, keeping other lines"""
+    # Like dotenv's set_key, keep the mode of the file that was read
+    try:
+        with open(env_file) as f:
+            mode = stat.S_IMODE(os.fstat(f.fileno()).st_mode)
+            lines = f.readlines()
+    except FileNotFoundError:
+        mode = 0o600
+        lines = []
+    
+    # Quote the same way dotenv's set_key does
+    quoted = {key: "'{}'".format(str(value).replace("'", "\\'")) for key, value in values.items()}
+    pending = dict(quoted)
+    for i, line in enumerate(lines):
+        match = re.match(r'\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_.]*)\s*=', line)
+        if match and match.group(1) in quoted:
+            key = match.group(1)
+            lines[i] = f'{key}={quoted[key]}\n'
+            pending.pop(key, None)
+    
+    if lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+    lines.extend(f'{key}={value}\n' for key, value in pending.items())
+    
+    write_file_atomic(env_file, ''.join(lines), mode)
 
 def save_account_config(account_id, config):
     """Save configuration for specific account"""
     env_file = os.path.join(ACCOUNTS_DIR, f'{account_id}.env')
     
-    # Write all config values
-    with open(env_file, 'w') as f:
-        for key, value in config.items():
-            if value:
-                # Handle multiline values (like SSH keys)
-                if '\n' in str(value):
-                    f.write(f'{key}="{value}"\n')
-                else:
-                    f.write(f'{key}={value}\n')
+    lines = []
+    for key, value in config.items():
+        if value:
+            # Handle multiline values (like SSH keys)
+            if '\n' in str(value):
+                lines.append(f'{key}="{value}"\n')
+            else:
+                lines.append(f'{key}={value}\n')
     
+    write_file_atomic(env_file, ''.join(lines))
+    
+    # Two saves within the filesystem's mtime resolution would leave the same
+    # mtime, so drop cached parses and clients explicitly
+    _invalidate_account_cache(env_file)
+    with _client_cache_lock:
+        _client_cache.pop(account_id, None)
     return True
 
 def delete_account(account_id):
@@ -173,6 +463,7 @@ def delete_account(account_id):
     env_file = os.path.join(ACCOUNTS_DIR, f'{account_id}.env')
     if os.path.exists(env_file):
         os.remove(env_file)
+        _invalidate_account_cache(env_file)
         return True
     return False
 
@@ -182,6 +473,15 @@ def generate_account_id():
 
 # ======================== OCI HELPERS ======================== #
 
+TERMINATED_STATES = frozenset(('TERMINATING', 'TERMINATED'))
+
+# Always Free limits per shape: (max OCPUs, max memory in GB)
+SHAPE_LIMITS = {
+    'VM.Standard.A1.Flex': (4, 24),
+    'VM.Standard.E2.1.Micro': (2, 2)
+}
+DEFAULT_SHAPE_LIMITS = SHAPE_LIMITS['VM.Standard.A1.Flex']
+
 def get_oci_config(account_id):
     """Build OCI config from account environment variables"""
     config = get_account_config(account_id)
@@ -196,14 +496,45 @@ def get_oci_config(account_id):
         'region': config.get('OCI_REGION', 'eu-frankfurt-1')
     }
 
+def get_clients(account_id):
+    """Get cached OCI clients for specific account"""
+    env_file = os.path.join(ACCOUNTS_DIR, f'{account_id}.env')
+    try:
+        mtime_ns = os.stat(env_file).st_mtime_ns
+    except OSError:
+        with _client_cache_lock:
+            _client_cache.pop(account_id, None)
+        return None
+    
+    with _client_cache_lock:
+        cached = _client_cache.get(account_id)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    
+    config = get_oci_config(account_id)
+    if not config:
+        return None
+    
+    clients = {
+        'config': config,
+        'compute': oci.core.ComputeClient(config),
+        'identity': oci.identity.IdentityClient(config),
+        'vcn': oci.core.VirtualNetworkClient(config),
+        'blockstorage': oci.core.BlockstorageClient(config)
+    }
+    with _client_cache_lock:
+        _client_cache[account_id] = (mtime_ns, clients)
+    return clients
+
 def test_oci_connection(account_id):
     """Test OCI API connection for specific account"""
     try:
-        config = get_oci_config(account_id)
-        if not config:
+        clients = get_clients(account_id)
+        if not clients:
             return False, "Account not found"
         
-        identity = oci.identity.IdentityClient(config)
+        config = clients['config']
+        identity = clients['identity']
         tenancy = identity.get_tenancy(tenancy_id=config['tenancy']).data
         return True, {'name': tenancy.name, 'description': tenancy.description}
     except Exception as e:
@@ -212,12 +543,13 @@ def test_oci_connection(account_id):
 def get_oci_instances(account_id):
     """Get list of OCI instances for specific account"""
     try:
-        config = get_oci_config(account_id)
-        if not config:
+        clients = get_clients(account_id)
+        if not clients:
             return []
         
+        config = clients['config']
         account_config = get_account_config(account_id)
-        compute = oci.core.ComputeClient(config)
+        compute = clients['compute']
         compartment_id = account_config.get('OCI_TENANCY_ID', config.get('tenancy', ''))
         instances = compute.list_instances(compartment_id=compartment_id).data
         
@@ -241,12 +573,13 @@ def get_oci_instances(account_id):
 def get_availability_domains(account_id):
     """Get available ADs for specific account"""
     try:
-        config = get_oci_config(account_id)
-        if not config:
+        clients = get_clients(account_id)
+        if not clients:
             return []
         
+        config = clients['config']
         account_config = get_account_config(account_id)
-        identity = oci.identity.IdentityClient(config)
+        identity = clients['identity']
         compartment_id = account_config.get('OCI_TENANCY_ID', config.get('tenancy', ''))
         ads = identity.list_availability_domains(compartment_id=compartment_id).data
         return [{'name': ad.name, 'id': ad.id} for ad in ads]
@@ -257,35 +590,36 @@ def get_availability_domains(account_id):
 def get_storage_info(account_id):
     """Get storage usage info for specific account"""
     try:
-        config = get_oci_config(account_id)
-        if not config:
+        clients = get_clients(account_id)
+        if not clients:
             return {'used': 0, 'total': 200, 'free': 200, 'percentage': 0}
         
+        config = clients['config']
         account_config = get_account_config(account_id)
-        volume_client = oci.core.BlockstorageClient(config)
+        volume_client = clients['blockstorage']
         compartment_id = account_config.get('OCI_TENANCY_ID', config.get('tenancy', ''))
         
-        total_size = 0
-        
-        # Block volumes
-        volumes = volume_client.list_volumes(compartment_id=compartment_id).data
-        for vol in volumes:
-            if vol.lifecycle_state not in ('TERMINATING', 'TERMINATED'):
-                total_size += vol.size_in_gbs
-        
-        # Boot volumes (all ADs)
-        ads = get_availability_domains(account_id)
-        for ad in ads:
+        def list_boot_volumes(ad):
             try:
-                boot_vols = volume_client.list_boot_volumes(
+                return volume_client.list_boot_volumes(
                     availability_domain=ad['name'],
                     compartment_id=compartment_id
                 ).data
-                for bvol in boot_vols:
-                    if bvol.lifecycle_state not in ('TERMINATING', 'TERMINATED'):
-                        total_size += bvol.size_in_gbs
             except:
-                pass
+                return []
+        
+        # Block volumes and boot volumes (all ADs) are independent calls, run them concurrently.
+        # No region has more than 3 ADs, so 4 workers cover everything in one round.
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            volumes_future = executor.submit(lambda: volume_client.list_volumes(compartment_id=compartment_id).data)
+            ads = get_availability_domains(account_id)
+            boot_vols = [bvol for vols in executor.map(list_boot_volumes, ads) for bvol in vols]
+            volumes = volumes_future.result()
+        
+        total_size = sum(
+            vol.size_in_gbs for vol in itertools.chain(volumes, boot_vols)
+            if vol.lifecycle_state not in TERMINATED_STATES
+        )
         
         return {
             'used': total_size,
@@ -297,27 +631,30 @@ def get_storage_info(account_id):
         logger.error(f"Failed to get storage info for {account_id}: {e}")
         return {'used': 0, 'total': 200, 'free': 200, 'percentage': 0}
 
+def compute_limits(account_config, instances):
+    """Compute resource usage against the shape's limits from an instance list"""
+    shape = account_config.get('OCI_SHAPE', 'VM.Standard.A1.Flex') if account_config else 'VM.Standard.A1.Flex'
+    
+    max_ocpus, max_memory = SHAPE_LIMITS.get(shape, DEFAULT_SHAPE_LIMITS)
+    
+    used_ocpus = used_memory = 0
+    for i in instances:
+        if i['state'] in TERMINATED_STATES:
+            continue
+        if isinstance(i['ocpus'], int):
+            used_ocpus += i['ocpus']
+        if isinstance(i['memory'], int):
+            used_memory += i['memory']
+    
+    return {
+        'ocpus': {'used': used_ocpus, 'max': max_ocpus, 'free': max_ocpus - used_ocpus},
+        'memory': {'used': used_memory, 'max': max_memory, 'free': max_memory - used_memory}
+    }
+
 def get_compute_limits(account_id):
     """Get compute resource limits for specific account"""
     try:
-        instances = get_oci_instances(account_id)
-        account_config = get_account_config(account_id)
-        shape = account_config.get('OCI_SHAPE', 'VM.Standard.A1.Flex') if account_config else 'VM.Standard.A1.Flex'
-        
-        if 'A1.Flex' in shape:
-            max_ocpus, max_memory = 4, 24
-        elif 'E2.1.Micro' in shape:
-            max_ocpus, max_memory = 2, 2
-        else:
-            max_ocpus, max_memory = 4, 24
-        
-        used_ocpus = sum(i['ocpus'] for i in instances if i['state'] not in ('TERMINATING', 'TERMINATED') and isinstance(i['ocpus'], int))
-        used_memory = sum(i['memory'] for i in instances if i['state'] not in ('TERMINATING', 'TERMINATED') and isinstance(i['memory'], int))
-        
-        return {
-            'ocpus': {'used': used_ocpus, 'max': max_ocpus, 'free': max_ocpus - used_ocpus},
-            'memory': {'used': used_memory, 'max': max_memory, 'free': max_memory - used_memory}
-        }
+        return compute_limits(get_account_config(account_id), get_oci_instances(account_id))
     except Exception as e:
         logger.error(f"Failed to get compute limits for {account_id}: {e}")
         return {
@@ -327,6 +664,64 @@ def get_compute_limits(account_id):
 
 # ======================== BOT MANAGEMENT ======================== #
 
+def set_status(account_id, **fields):
+    """Update an account's bot status fields"""
+    # The snapshot shares these dicts, so field updates need no invalidation
+    bot_status[account_id].update(fields)
+
+def invalidate_status_snapshot():
+    """Force the next status_snapshot() call to rebuild; needed only when
+    bot_status gains or replaces an entry"""
+    global _status_snapshot
+    _status_snapshot = None
+
+def status_snapshot():
+    """Copy of every bot status, only rebuilt when an account's entry was added or replaced"""
+    global _status_snapshot
+    if _status_snapshot is None:
+        # Plain C-level copy; the status dicts themselves are shared, which is safe
+        # because encoding the emit never yields to another greenlet
+        _status_snapshot = dict(bot_status)
+    return _status_snapshot
+
+def mark_status_dirty(account_id):
+    """Queue an account's status for the next batched bot_status broadcast"""
+    global _status_broadcaster
+    with _status_lock:
+        _dirty_statuses.add(account_id)
+        if _status_broadcaster is None:
+            _status_broadcaster = socketio.start_background_task(broadcast_status_loop)
+
+def broadcast_status_loop():
+    """Emit all changed bot statuses as one frame every STATUS_BROADCAST_INTERVAL"""
+    while True:
+        socketio.sleep(STATUS_BROADCAST_INTERVAL)
+        with _status_lock:
+            if not _dirty_statuses:
+                continue
+            dirty = list(_dirty_statuses)
+            _dirty_statuses.clear()
+        
+        # Counts ride along so pages can update their totals without polling the API
+        payload = {
+            'statuses': {aid: bot_status[aid] for aid in dirty if aid in bot_status},
+            'running': sum(1 for status in bot_status.values() if status.get('running'))
+        }
+        try:
+            socketio.emit('bot_status_batch', payload, namespace='/logs')
+        except Exception as e:
+            logger.error(f"Failed to broadcast bot status: {e}")
+
+_utc_now_cache = (0, '')  # (epoch second, formatted string)
+
+def utc_now_str():
+    """Current UTC time as a display string, formatted at most once per second"""
+    global _utc_now_cache
+    now = int(time.time())
+    if now != _utc_now_cache[0]:
+        _utc_now_cache = (now, time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime(now)))
+    return _utc_now_cache[1]
+
 def run_bot_thread(account_id):
     """Run the bot for a specific account"""
     global bot_status
@@ -366,12 +761,13 @@ def run_bot_thread(account_id):
             pass
     
     try:
-        compute_client = oci.core.ComputeClient(config)
-        vcn_client = oci.core.VirtualNetworkClient(config)
-        identity_client = oci.identity.IdentityClient(config)
+        clients = get_clients(account_id)
+        compute_client = clients['compute']
+        vcn_client = clients['vcn']
+        identity_client = clients['identity']
     except Exception as e:
         account_logger.error(f"Failed to initialize OCI clients: {e}")
-        bot_status[account_id]['running'] = False
+        set_status(account_id, running=False)
         return
     
     # Get availability domains
@@ -380,7 +776,7 @@ def run_bot_thread(account_id):
         ad_names = [ad.name for ad in ads]
     except Exception as e:
         account_logger.error(f"Failed to get availability domains: {e}")
-        bot_status[account_id]['running'] = False
+        set_status(account_id, running=False)
         return
     
     # Custom AD from config
@@ -402,40 +798,59 @@ def run_bot_thread(account_id):
         except:
             pass
     
+    # Launch requests only differ by AD, so build them once instead of on every retry
+    source_details = oci.core.models.InstanceSourceViaImageDetails(
+        source_type="image",
+        image_id=image_id
+    )
+    
+    launch_details = {}
+    for ad in ad_names:
+        launch_details[ad] = oci.core.models.LaunchInstanceDetails(
+            metadata={"ssh_authorized_keys": ssh_key},
+            availability_domain=ad,
+            shape=shape,
+            compartment_id=compartment_id,
+            display_name=display_name,
+            is_pv_encryption_in_transit_enabled=True,
+            source_details=source_details,
+            create_vnic_details=oci.core.models.CreateVnicDetails(
+                assign_public_ip=True,
+                subnet_id=subnet_id
+            ),
+            shape_config=oci.core.models.LaunchInstanceShapeConfigDetails(
+                ocpus=ocpus,
+                memory_in_gbs=memory
+            )
+        )
+    
     retry_count = 0
     tc = oc = 0
     
-    while bot_status.get(account_id, {}).get('running', False):
+    # Identical consecutive errors are collapsed into one report per RETRY_REPORT_INTERVAL
+    last_sig = None
+    last_report = 0
+    suppressed = 0
+    
+    def should_report(sig):
+        """Return the suppressed-duplicates suffix if this error should be reported, else None"""
+        nonlocal last_sig, last_report, suppressed
+        now = time.time()
+        if sig == last_sig and now - last_report < RETRY_REPORT_INTERVAL:
+            suppressed += 1
+            return None
+        suffix = f" | +{suppressed} similar" if suppressed else ""
+        last_sig, last_report, suppressed = sig, now, 0
+        return suffix
+    
+    while bot_status.get(account_id, EMPTY_STATUS).get('running', False):
         for ad in ad_names:
-            if not bot_status.get(account_id, {}).get('running', False):
+            if not bot_status.get(account_id, EMPTY_STATUS).get('running', False):
                 break
             
-            bot_status[account_id]['current_ad'] = ad
-            bot_status[account_id]['last_check'] = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+            set_status(account_id, current_ad=ad, last_check=utc_now_str())
             
-            # Build source details
-            source_details = oci.core.models.InstanceSourceViaImageDetails(
-                source_type="image",
-                image_id=image_id
-            )
-            
-            instance_details = oci.core.models.LaunchInstanceDetails(
-                metadata={"ssh_authorized_keys": ssh_key},
-                availability_domain=ad,
-                shape=shape,
-                compartment_id=compartment_id,
-                display_name=display_name,
-                is_pv_encryption_in_transit_enabled=True,
-                source_details=source_details,
-                create_vnic_details=oci.core.models.CreateVnicDetails(
-                    assign_public_ip=True,
-                    subnet_id=subnet_id
-                ),
-                shape_config=oci.core.models.LaunchInstanceShapeConfigDetails(
-                    ocpus=ocpus,
-                    memory_in_gbs=memory
-                )
-            )
+            instance_details = launch_details[ad]
             
             try:
                 response = compute_client.launch_instance(instance_details)
@@ -482,14 +897,13 @@ def run_bot_thread(account_id):
                     except:
                         pass
                 
-                bot_status[account_id]['running'] = False
-                socketio.emit('bot_status', {'account_id': account_id, 'status': bot_status[account_id]}, namespace='/logs')
+                set_status(account_id, running=False)
+                mark_status_dirty(account_id)
                 return
                 
             except oci.exceptions.ServiceError as e:
                 retry_count += 1
-                bot_status[account_id]['retry_count'] = retry_count
-                bot_status[account_id]['last_error'] = f"{e.code}: {e.message}"
+                set_status(account_id, retry_count=retry_count, last_error=f"{e.code}: {e.message}")
                 
                 # Adaptive wait time with randomization
                 if e.status == 429:
@@ -510,42 +924,55 @@ def run_bot_thread(account_id):
                 # Random wait between min_wait and current wait_time
                 actual_wait = random.randint(min_wait, max(min_wait, wait_time))
                 
-                ad_short = ad.split(':')[-1] if ':' in ad else ad
-                account_logger.info(f"[{account_name}] ❌ {e.status} - {e.code} | AD: {ad_short} | Retry #{retry_count} | Wait: {actual_wait}s")
+                # Counters change on every retry; the broadcaster caps the frame rate
+                mark_status_dirty(account_id)
+                
+                suffix = should_report((e.status, e.code))
+                if suffix is not None:
+                    ad_short = ad.split(':')[-1] if ':' in ad else ad
+                    account_logger.info(f"[{account_name}] ❌ {e.status} - {e.code} | AD: {ad_short} | Retry #{retry_count} | Wait: {actual_wait}s{suffix}")
                 
-                socketio.emit('bot_status', {'account_id': account_id, 'status': bot_status[account_id]}, namespace='/logs')
                 time.sleep(actual_wait)
                 
             except Exception as e:
                 retry_count += 1
-                bot_status[account_id]['retry_count'] = retry_count
-                bot_status[account_id]['last_error'] = str(e)
+                set_status(account_id, retry_count=retry_count, last_error=str(e))
                 actual_wait = random.randint(min_wait, max(min_wait, wait_time))
-                account_logger.error(f"[{account_name}] Error: {e} | Retry #{retry_count} | Wait: {actual_wait}s")
-                socketio.emit('bot_status', {'account_id': account_id, 'status': bot_status[account_id]}, namespace='/logs')
+                
+                mark_status_dirty(account_id)
+                
+                suffix = should_report((type(e).__name__, str(e)))
+                if suffix is not None:
+                    account_logger.error(f"[{account_name}] Error: {e} | Retry #{retry_count} | Wait: {actual_wait}s{suffix}")
+                
                 time.sleep(actual_wait)
     
     account_logger.info(f"[{account_name}] Bot stopped")
 
-def start_bot(account_id):
-    """Start the bot for a specific account"""
-    global bot_status, bot_threads
-    
-    if account_id in bot_status and bot_status[account_id].get('running'):
-        return False, "Bot is already running"
-    
-    bot_status[account_id] = {
+def new_bot_status(start_time):
+    """Initial status dict for a freshly started bot"""
+    return {
         'running': True,
-        'start_time': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC'),
+        'start_time': start_time,
         'retry_count': 0,
         'last_error': None,
         'last_check': None,
         'current_ad': None
     }
+
+def start_bot(account_id):
+    """Start the bot for a specific account"""
+    global bot_status, bot_threads
     
-    thread = threading.Thread(target=run_bot_thread, args=(account_id,), daemon=True)
-    thread.start()
-    bot_threads[account_id] = thread
+    with bot_status_lock:
+        if account_id in bot_status and bot_status[account_id].get('running'):
+            return False, "Bot is already running"
+        
+        bot_status[account_id] = new_bot_status(utc_now_str())
+        invalidate_status_snapshot()
+    
+    bot_threads[account_id] = socketio.start_background_task(run_bot_thread, account_id)
+    mark_status_dirty(account_id)
     
     return True, "Bot started successfully"
 
@@ -553,32 +980,43 @@ def stop_bot(account_id):
     """Stop the bot for a specific account"""
     global bot_status
     
-    if account_id not in bot_status or not bot_status[account_id].get('running'):
-        return False, "Bot is not running"
-    
-    bot_status[account_id]['running'] = False
+    with bot_status_lock:
+        if account_id not in bot_status or not bot_status[account_id].get('running'):
+            return False, "Bot is not running"
+        
+        set_status(account_id, running=False)
+    mark_status_dirty(account_id)
     return True, "Bot stopped"
 
 def start_all_bots():
     """Start bots for all accounts"""
     accounts = get_accounts()
-    started = 0
-    for account in accounts:
-        if not account['status'].get('running'):
-            success, _ = start_bot(account['id'])
-            if success:
-                started += 1
-    return started
+    
+    # Claim every idle account in one pass, then spawn the greenlets outside the lock
+    with bot_status_lock:
+        start_time = utc_now_str()
+        targets = [a['id'] for a in accounts if not bot_status.get(a['id'], EMPTY_STATUS).get('running')]
+        for account_id in targets:
+            bot_status[account_id] = new_bot_status(start_time)
+        invalidate_status_snapshot()
+    
+    for account_id in targets:
+        bot_threads[account_id] = socketio.start_background_task(run_bot_thread, account_id)
+        mark_status_dirty(account_id)
+    return len(targets)
 
 def stop_all_bots():
     """Stop all running bots"""
-    stopped = 0
-    for account_id in list(bot_status.keys()):
-        if bot_status[account_id].get('running'):
-            success, _ = stop_bot(account_id)
-            if success:
-                stopped += 1
-    return stopped
+    stopped = []
+    with bot_status_lock:
+        for account_id, status in bot_status.items():
+            if status.get('running'):
+                status['running'] = False
+                stopped.append(account_id)
+    
+    for account_id in stopped:
+        mark_status_dirty(account_id)
+    return len(stopped)
 
 # ======================== ROUTES ======================== #
 
@@ -630,10 +1068,30 @@ def settings():
 
 # ======================== API ENDPOINTS ======================== #
 
+def jsonify_with_etag(payload):
+    """jsonify() with a weak ETag, answering 304 when the client already has this payload"""
+    # Encode once: the same bytes are hashed for the ETag and sent as the body
+    body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+    
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype='application/json')
+    
+    response.set_etag(etag, weak=True)
+    # Let the browser keep the body but revalidate on every poll
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def raw_json_response(payload):
+    """Encode straight to bytes with orjson for the larger log payloads"""
+    return Response(orjson.dumps(payload), mimetype='application/json', direct_passthrough=True)
+
 @app.route('/api/accounts')
 @login_required
 def api_accounts():
-    return jsonify(get_accounts())
+    return jsonify_with_etag(get_accounts())
 
 @app.route('/api/accounts/create', methods=['POST'])
 @login_required
@@ -708,6 +1166,16 @@ def api_account_storage(account_id):
 def api_account_compute(account_id):
     return jsonify(get_compute_limits(account_id))
 
+@app.route('/api/accounts/<account_id>/instances-summary')
+@login_required
+def api_account_instances_summary(account_id):
+    # One list_instances call feeds both the instance table and the compute limits
+    instances = get_oci_instances(account_id)
+    return jsonify({
+        'instances': instances,
+        'compute': compute_limits(get_account_config(account_id), instances)
+    })
+
 @app.route('/api/accounts/<account_id>/availability-domains')
 @login_required
 def api_account_ads(account_id):
@@ -720,7 +1188,7 @@ def api_account_bot_start(account_id):
     return jsonify({
         'success': success,
         'message': message,
-        'status': bot_status.get(account_id, {})
+        'status': bot_status.get(account_id, EMPTY_STATUS)
     })
 
 @app.route('/api/accounts/<account_id>/bot/stop', methods=['POST'])
@@ -730,13 +1198,13 @@ def api_account_bot_stop(account_id):
     return jsonify({
         'success': success,
         'message': message,
-        'status': bot_status.get(account_id, {})
+        'status': bot_status.get(account_id, EMPTY_STATUS)
     })
 
 @app.route('/api/accounts/<account_id>/logs')
 @login_required
 def api_account_logs(account_id):
-    return jsonify(logs_buffer.get(account_id, [])[-100:])
+    return raw_json_response(log_tail(logs_buffer.get(account_id, ()), 100))
 
 @app.route('/api/bot/start-all', methods=['POST'])
 @login_required
@@ -761,19 +1229,14 @@ def api_status():
         'accounts': len(accounts),
         'running': running_count,
         'total_retries': total_retries,
-        'server_time': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+        'server_time': utc_now_str()
     })
 
 @app.route('/api/logs')
 @login_required
 def api_all_logs():
-    all_logs = []
-    for account_id, logs in logs_buffer.items():
-        all_logs.extend(logs[-50:])
-    
-    # Sort by timestamp
-    all_logs.sort(key=lambda x: x['timestamp'], reverse=True)
-    return jsonify(all_logs[:100])
+    # recent_logs is kept in time order as logs are produced; newest first here
+    return raw_json_response(recent_log_entries()[::-1])
 
 @app.route('/api/settings', methods=['GET', 'POST'])
 @login_required
@@ -784,17 +1247,17 @@ def api_settings():
         return jsonify({
             'WEB_USERNAME': os.getenv('WEB_USERNAME', 'admin'),
             'ACCOUNTS_DIR': os.getenv('ACCOUNTS_DIR', './accounts'),
-            'WEB_PORT': os.getenv('WEB_PORT', '5000')
+            'WEB_PORT': str(WEB_PORT)
         })
     
     if request.method == 'POST':
         data = request.json
         
         try:
-            for key, value in data.items():
-                if key in ['WEB_USERNAME', 'WEB_PASSWORD', 'ACCOUNTS_DIR', 'SECRET_KEY']:
-                    set_key(env_file, key, str(value))
-                    os.environ[key] = str(value)
+            updates = {key: str(value) for key, value in data.items()
+                       if key in ['WEB_USERNAME', 'WEB_PASSWORD', 'ACCOUNTS_DIR', 'SECRET_KEY']}
+            update_env_file(env_file, updates)
+            os.environ.update(updates)
             
             return jsonify({'success': True, 'message': 'Settings saved'})
         except Exception as e:
@@ -807,7 +1270,7 @@ def api_dashboard_stats():
     running_bots = sum(1 for a in accounts if a['status'].get('running'))
     total_retries = sum(a['status'].get('retry_count', 0) for a in accounts)
     
-    return jsonify({
+    return jsonify_with_etag({
         'total_accounts': len(accounts),
         'running_bots': running_bots,
         'total_retries': total_retries,
@@ -818,38 +1281,63 @@ def api_dashboard_stats():
 
 @socketio.on('connect', namespace='/logs')
 def handle_connect():
-    # Send all logs
-    all_logs = []
-    for account_id, logs in logs_buffer.items():
-        all_logs.extend(logs[-20:])
-    all_logs.sort(key=lambda x: x['timestamp'])
+    global _logs_subscribers
+    _logs_subscribers += 1
+    
+    # Copy under the lock, emit after releasing it - a slow socket write
+    # must not hold up bots starting or stopping
+    with bot_status_lock:
+        logs = log_tail(recent_log_entries(), 50, LOG_HISTORY_BYTES)
+        accounts = status_snapshot()
     
-    emit('log_history', all_logs[-50:])
-    emit('accounts_status', {aid: status for aid, status in bot_status.items()})
+    # One frame carrying both the log tail and every bot status
+    emit('initial_state', {'logs': logs, 'accounts': accounts})
+
+@socketio.on('disconnect', namespace='/logs')
+def handle_disconnect():
+    global _logs_subscribers
+    _logs_subscribers = max(0, _logs_subscribers - 1)
 
 @socketio.on('subscribe', namespace='/logs')
 def handle_subscribe(data):
     account_id = data.get('account_id')
-    if account_id and account_id in logs_buffer:
-        emit('log_history', logs_buffer[account_id][-50:])
-        emit('bot_status', {'account_id': account_id, 'status': bot_status.get(account_id, {})})
+    if not account_id:
+        return
+    
+    # Log lines are only pushed to clients that joined the matching room
+    if account_id == '*':
+        join_room(ALL_LOGS_ROOM)
+        return
+    
+    join_room(log_room(account_id))
+    with bot_status_lock:
+        history = log_tail(logs_buffer.get(account_id, ()), 50, LOG_HISTORY_BYTES)
+        status = dict(bot_status[account_id]) if account_id in bot_status else EMPTY_STATUS
+    
+    # The account page renders both replies in place of its own fetches;
+    # on reconnect they replace whatever it showed before
+    emit('log_history', history)
+    emit('bot_status', {'account_id': account_id, 'status': status})
+
+@socketio.on('unsubscribe', namespace='/logs')
+def handle_unsubscribe(data):
+    account_id = data.get('account_id')
+    if account_id:
+        leave_room(ALL_LOGS_ROOM if account_id == '*' else log_room(account_id))
 
 # ======================== MAIN ======================== #
 
 if __name__ == '__main__':
     # Create .env file if not exists
-    if not os.path.exists('.env'):
-        with open('.env', 'w') as f:
-            f.write('WEB_USERNAME=admin\n')
-            f.write('WEB_PASSWORD=admin123\n')
-            f.write(f'SECRET_KEY={secrets.token_hex(32)}\n')
-            f.write('ACCOUNTS_DIR=./accounts\n')
-    
-    port = int(os.getenv('WEB_PORT', 5000))
-    host = os.getenv('WEB_HOST', '0.0.0.0')
-    debug = os.getenv('DEBUG', 'false').lower() == 'true'
-    
-    logger.info(f"Starting OCI Admin Panel on {host}:{port}")
+    if not Path('.env').is_file():
+        Path('.env').write_text(
+            'WEB_USERNAME=admin\n'
+            'WEB_PASSWORD=admin123\n'
+            f'SECRET_KEY={secrets.token_hex(32)}\n'
+            'ACCOUNTS_DIR=./accounts\n'
+        )
+    
+    logger.info(f"Starting OCI Admin Panel on {WEB_HOST}:{WEB_PORT}")
     logger.info(f"Accounts directory: {ACCOUNTS_DIR}")
     
-    socketio.run(app, host=host, port=port, debug=debug, allow_unsafe_werkzeug=True)
+    socketio.run(app, host=WEB_HOST, port=WEB_PORT, debug=DEBUG)
@@ -44,7 +44,7 @@ fi
 # Install packages
 echo -e "${YELLOW}Installing Python packages...${NC}"
 source venv/bin/activate
-pip install flask flask-socketio python-socketio oci pyTelegramBotAPI python-dotenv simple-websocket -q
+pip install flask flask-socketio python-socketio oci pyTelegramBotAPI python-dotenv simple-websocket eventlet orjson msgpack -q
 
 # Create accounts directory
 mkdir -p accounts
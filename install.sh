@@ -159,7 +159,7 @@ install_packages() {
         echo -e "${GREEN}✅ Python packages installed${NC}"
     else
         echo -e "${YELLOW}⚠️  requirements.txt not found. Installing manually...${NC}"
-        pip install flask flask-socketio python-socketio python-engineio oci pyTelegramBotAPI python-dotenv werkzeug simple-websocket -q
+        pip install flask flask-socketio python-socketio python-engineio oci pyTelegramBotAPI python-dotenv werkzeug simple-websocket eventlet orjson msgpack -q
         echo -e "${GREEN}✅ Python packages installed${NC}"
     fi
 }
@@ -28,11 +28,11 @@ source venv/bin/activate
 
 # Always check and install packages
 echo -e "${YELLOW}Checking packages...${NC}"
-pip install flask flask-socketio python-socketio oci pyTelegramBotAPI python-dotenv simple-websocket -q 2>/dev/null
+pip install flask flask-socketio python-socketio oci pyTelegramBotAPI python-dotenv simple-websocket eventlet orjson msgpack -q 2>/dev/null
 
 if [ $? -ne 0 ]; then
     echo -e "${RED}Package installation failed. Trying with --break-system-packages...${NC}"
-    pip install flask flask-socketio python-socketio oci pyTelegramBotAPI python-dotenv simple-websocket --break-system-packages -q
+    pip install flask flask-socketio python-socketio oci pyTelegramBotAPI python-dotenv simple-websocket eventlet orjson msgpack --break-system-packages -q
 fi
 
 # Create accounts directory